@@ -1,10 +1,83 @@
-from .config import Config, Mini, validate_bool  # noqa: 401
-from .from_xml import from_xml  # noqa: 401
-from .load_from_path import load_from_path, load_lines_from_path  # noqa: 401
-from .normalize_path import normalize_path  # noqa: 401
-from .import_by_path import import_by_path  # noqa: 401
-from .nested_get import nested_get  # noqa: 401
+"""
+Top-level names are imported lazily (PEP 562), so that a program only pays
+for the submodules it uses.
+"""
+import importlib
+import sys
+import types
 
-from .to_args import to_args # noqa: 401
+_LAZY = {
+    'Config': 'config',
+    'ConfigWatcher': 'config',
+    'Mini': 'config',
+    'validate_bool': 'config',
 
-from .un_comment import un_comment  # noqa: 401
+    'from_xml': 'from_xml',
+    'from_xml_many': 'from_xml',
+    'iter_xml': 'from_xml',
+
+    'aload_from_path': 'load_from_path',
+    'aload_lines_from_path': 'load_from_path',
+    'clear_resource_cache': 'load_from_path',
+    'iter_lines_from_path': 'load_from_path',
+    'load_from_path': 'load_from_path',
+    'load_lines_from_path': 'load_from_path',
+    'load_resource': 'load_from_path',
+
+    'clear_path_cache': 'normalize_path',
+    'normalize_path': 'normalize_path',
+    'prewarm_path_cache': 'normalize_path',
+
+    'LazyImport': 'import_by_path',
+    'import_by_path': 'import_by_path',
+
+    'compile_find': 'nested_get',
+    'compile_path': 'nested_get',
+    'nested_find': 'nested_get',
+    'nested_get': 'nested_get',
+    'nested_get_many': 'nested_get',
+
+    'make_to_args_cache': 'to_args',
+    'to_args': 'to_args',
+    'to_args_cached': 'to_args',
+
+    'SharedConfig': 'shared_config',
+
+    'make_un_commenter': 'un_comment',
+    'un_comment': 'un_comment',
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+class _Package(types.ModuleType):
+
+    def __setattr__(self, name, value):
+        """ don't let a submodule hide the function of the same name
+
+            The import system sets each newly loaded submodule as an
+            attribute of this package. Several submodules are named
+            after the function they define (eg, from_xml), which would
+            otherwise replace the function.
+        """
+        if name in _LAZY and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super(_Package, self).__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
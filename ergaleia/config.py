@@ -1,8 +1,13 @@
 from collections import namedtuple
+import marshal
 import os
+import threading
+import time
 
 from ergaleia.import_by_path import import_by_path
-from ergaleia.load_from_path import load_lines_from_path
+from ergaleia.load_from_path import (
+    aload_lines_from_path, iter_lines_from_path)
+from ergaleia.normalize_path import normalize_path
 from ergaleia.to_args import to_args
 from ergaleia.un_comment import un_comment
 
@@ -10,9 +15,7 @@ from ergaleia.un_comment import un_comment
 class _branch(dict):
 
     def __lookup(self, name):
-        if name not in self:
-            raise KeyError(name)
-        return self.get(name)
+        return dict.__getitem__(self, name)
 
     def __getattr__(self, name):
         attr = self.__lookup(name)
@@ -79,12 +82,22 @@ class Config(_branch):
          env variable of this name is set, then the value of the env variable
          overrides the 'value' parameter and any parmemter read using the _load
          method. Values which are directly set override env.
+
+      6. The environment is os.environ, unless a mapping is specified with
+         the environ parameter (of the constructor, or of _load). The
+         _define_from_path and _load methods take a snapshot of os.environ
+         once, and use it for every key. The _env_overridden property lists
+         the keys whose values came from the environment.
     """
 
-    def __init__(self, definition=None, filetype=None):
+    def __init__(self, definition=None, filetype=None, lazy=False,
+                 cache=None, environ=None):
         self.__dict__['_ordered_keys'] = []
+        self.__dict__['_index'] = {}  # full dotted name -> _item
+        self.__dict__['_subscriptions'] = _Subscriptions()
+        self.__dict__['_environ'] = environ
         if definition:
-            self._define_from_path(definition, filetype)
+            self._define_from_path(definition, filetype, lazy, cache)
 
     def __repr__(self):
         return '\n'.join(
@@ -105,9 +118,15 @@ class Config(_branch):
         return level, itemname
 
     def _define(self, name, value=None, validator=None, env=None):
-        keys = self.__dict__['_ordered_keys']
-        if name not in keys:
-            keys.append(name)
+        self.__define(name, value, validator, env, self.__dict__['_environ'])
+
+    def __define(self, name, value=None, validator=None, env=None,
+                 environ=None):
+        index = self.__dict__['_index']
+        item = index.get(str(name))
+        if item is not None:
+            item.reset(value, validator, env, environ)
+            return
         parts = str(name).split('.')
         parts, itemname = parts[:-1], parts[-1]
         level = self
@@ -117,42 +136,65 @@ class Config(_branch):
                 raise Exception(
                     'member {} of {} is a leaf node'.format(part, name)
                 )
-        item = level.get(itemname)
-        if item:
-            if isinstance(item, _item):
-                item.reset(value, validator, env)
-            else:
-                raise Exception(
-                    'member {} of {} is a branch node'.format(itemname, name)
-                )
-        else:
-            level.setdefault(itemname, _item(value, validator, env))
+        if itemname in level:  # items are in the index, so this is a branch
+            raise Exception(
+                'member {} of {} is a branch node'.format(itemname, name)
+            )
+        item = level.setdefault(
+            itemname, _item(value, validator, env, environ)
+        )
+        item.__dict__['name'] = str(name)
+        item.__dict__['subscriptions'] = self.__dict__['_subscriptions']
+        index[str(name)] = item
+        self.__dict__['_ordered_keys'].append(name)
 
-    def _define_from_path(self, path, filetype=None):
-        data = un_comment(load_lines_from_path(path, filetype))
-        for num, line in enumerate(data, start=1):
-            if not line:
-                continue
+    def _define_from_path(self, path, filetype=None, lazy=False, cache=None):
+        """ define keys from definition statements in a file
+
+            Parameters:
+                path     - path to definition statements (see _load)
+                filetype - type component of dot-delimited path
+                lazy     - if True, defer validator imports (see Note 1)
+                cache    - directory for parsed definitions (see Note 2)
+
+            Notes:
+
+                1. A validator that is not one of the builtin validators is
+                   located with import_by_path. If lazy is True, the import
+                   is deferred until the validator is first called, which
+                   also defers the reporting of an invalid validator.
+
+                2. If cache is specified, and path is a file, the parsed
+                   definition statements are saved in the cache directory,
+                   and re-used until the file's modification time or size
+                   changes.
+
+                3. Env overrides are resolved against one snapshot of the
+                   environment (see Note 6 of the class).
+        """
+        environ = self.__environ(None)
+        for num, args, kwargs in _load_definition(path, filetype, cache):
             try:
-                args, kwargs = to_args(line)
                 if 'validator' in kwargs:
                     validator = kwargs.get('validator')
                     try:
                         kwargs['validator'] = _VALIDATE_MAP[validator]
                     except KeyError:
                         try:
-                            kwargs['validator'] = import_by_path(validator)
+                            kwargs['validator'] = import_by_path(
+                                validator, lazy)
                         except Exception:
                             raise Exception(
                                 'Invalid validator: {}'.format(validator)
                             )
-                self._define(*args, **kwargs)
+                self.__define(*args, environ=environ, **kwargs)
             except Exception as e:
                 raise Exception(
                     'Error on line {} of definition: {}'.format(num, e)
                 )
 
-    def _load(self, path='config', filetype=None, relaxed=False, ignore=False):
+    def _load(self, path='config', filetype=None, relaxed=False, ignore=False,
+              environ=None):
         """ load key value pairs from a file
 
             Parameters:
@@ -160,6 +202,7 @@ class Config(_branch):
                 filetype - type component of dot-delimited path
                 relaxed  - if True, define keys on the fly (see Note 2)
                 ignore   - if True, ignore undefined keys in path
+                environ  - mapping used for env overrides (see Note 3)
 
             Return:
                 self
@@ -167,7 +210,7 @@ class Config(_branch):
             Notes:
 
                 1. The path can be:
-                    * an open file object with a readlines method
+                    * an open file object (or other iterable of lines)
                     * a dot delimited path to a file (see normalize_path)
                     * an os-specific path to a file (relative to cwd)
                     * an iterable of key=value strings
@@ -177,9 +220,15 @@ class Config(_branch):
                    is True, any keys found in the file will be accepted.
                    If the ignore flag is True, and kyes found in the file
                    that are not previously defined are ignored.
+
+                3. If environ is not specified, the Config's environ is
+                   used; if that is not specified either, a snapshot of
+                   os.environ is taken once, at the start of the load.
         """
+        environ = self.__environ(environ)
+        index = self.__dict__['_index']
         for num, line in enumerate(
-                    un_comment(load_lines_from_path(path, filetype)),
+                    un_comment(iter_lines_from_path(path, filetype)),
                     start=1,
                 ):
             if not line:
@@ -190,28 +239,193 @@ class Config(_branch):
                 val = val.strip()
                 if relaxed:
                     self._define(key)
-                try:
-                    level, itemname = self.__lookup(key)
-                except KeyError:
+                item = index.get(key)
+                if item is None:
                     if ignore:
                         continue
-                    raise
-                item = level.get(itemname)
-                if item is None:
-                    raise KeyError(itemname)
-                item.load(val)
+                    raise KeyError(key)
+                item.load(val, environ)
             except Exception as e:
-                args = e.args or ('',)
-                msg = 'line {} of config: {}'. format(num, args[0])
-                e.args = (msg,) + args[1:]
+                _line_error(e, num)
                 raise
         return self
 
+    def _reload(self, path='config', filetype=None, relaxed=False,
+                ignore=False, environ=None):
+        """ re-load key value pairs from a file, changing only what differs
+
+            Parameters: (see _load)
+
+            Return:
+                set of the names whose values changed
+
+            Notes:
+
+                1. A value is skipped if its current value came from the
+                   same text in the file (it was loaded, and not set
+                   directly since), and its key has no env (so that a
+                   change in the environment is seen). Other values in
+                   the file are re-validated and assigned.
+
+                2. A key whose current value was loaded, but is no longer
+                   in the file, reverts to its defined value.
+
+                3. A key that is not in the file, and whose current value
+                   was not loaded (eg, it was set directly), is not
+                   changed.
+
+                4. If relaxed is True, keys not previously defined are
+                   defined on the fly; keys already defined are not
+                   re-defined.
+
+                5. Every value is validated before any is changed, so if
+                   there is an error, no values are changed (though keys
+                   defined by relaxed remain defined).
+
+                6. The environ parameter works as it does for _load.
+        """
+        environ = self.__environ(environ)
+        index = self.__dict__['_index']
+        lines = {}
+        for num, line in enumerate(
+                    un_comment(iter_lines_from_path(path, filetype)),
+                    start=1,
+                ):
+            if not line:
+                continue
+            try:
+                key, val = line.split('=', 1)
+                key = key.strip()
+                if key not in index:
+                    if relaxed:
+                        self._define(key)
+                    elif ignore:
+                        continue
+                    else:
+                        raise KeyError(key)
+                lines[key] = num, val.strip()
+            except Exception as e:
+                _line_error(e, num)
+                raise
+
+        updates = []  # validate everything before changing anything
+        for key, item in index.items():
+            if key in lines:
+                num, val = lines[key]
+                if val == item.raw and not item.env:
+                    continue
+                try:
+                    resolved = item.resolve(val, val, environ)
+                except Exception as e:
+                    _line_error(e, num)
+                    raise
+            elif item.raw is not None:
+                resolved = item.resolve(item.default, None, environ)
+            else:
+                continue
+            updates.append((key, item, resolved))
+
+        changed = set()
+        for key, item, resolved in updates:
+            old = item.value
+            item.assign(resolved)
+            if item.value != old:
+                changed.add(key)
+        return changed
+
+    async def _aload(self, path='config', filetype=None, relaxed=False,
+                     ignore=False, executor=None, environ=None):
+        """ load key value pairs from a file without blocking the event loop
+
+            The file is read in a thread (see aload_from_path), and then
+            parsed and loaded as it would be by the _load method.
+
+            Parameters: (see _load)
+                executor - concurrent.futures.Executor to run in (optional)
+
+            Return:
+                self
+
+            Notes:
+                1. Several configs can be loaded concurrently with
+                   asyncio.gather:
+
+                   await asyncio.gather(a._aload('a'), b._aload('b'))
+        """
+        lines = await aload_lines_from_path(path, filetype, executor=executor)
+        return self._load(
+            lines, relaxed=relaxed, ignore=ignore, environ=environ
+        )
+
+    def _on_change(self, pattern, callback):
+        """ call callback when the value of a matching name changes
+
+            Parameters:
+                pattern  - dot-delimited name, which can contain '*'
+                           (see Note 1)
+                callback - callable(name, old value, new value)
+
+            Return:
+                callback
+
+            Notes:
+
+                1. A '*' matches any one part of a name. A trailing '*'
+                   matches one or more parts, so 'db.*' matches 'db.host'
+                   and 'db.pool.size', but not 'db'.
+
+                2. The callback is called whenever a value is changed to
+                   something that is not equal to the old value, whether
+                   by direct setting, _set, _load or _reload.
+        """
+        self.__dict__['_subscriptions'].add(pattern, callback)
+        return callback
+
+    def _freeze(self, name='FrozenConfig'):
+        """ return an immutable snapshot of the Config
+
+            The snapshot is a namedtuple, with a nested namedtuple for
+            each branch, so values are read with plain attribute access:
+
+                frozen = c._freeze()
+                assert frozen.server.port == c.server.port
+
+            Parameters:
+                name - namedtuple typename
+
+            Notes:
+
+                1. Names which are not valid identifiers (eg, '10') are
+                   renamed by position (eg, '_0'); see namedtuple.
+
+                2. The snapshot does not change when the Config does.
+                   Call _freeze again (eg, after a reload) for a fresh
+                   snapshot.
+        """
+        return _freeze(self, name)
+
+    def __environ(self, environ):
+        if environ is None:
+            environ = self.__dict__['_environ']
+        if environ is None:
+            environ = dict(os.environ)
+        return environ
+
+    @property
+    def _env_overridden(self):
+        """ set of the names whose values came from the environment """
+        return {
+            k for k, item in self.__dict__['_index'].items() if item.from_env
+        }
+
     @property
     def _as_dict(self):
         return {k: v for k, v in self.__ordered()}
 
     def _get(self, name):
+        item = self.__dict__['_index'].get(str(name))
+        if item is not None:
+            return item.value
         level, itemname = self.__lookup(name)
         try:
             return level[itemname]
@@ -219,36 +433,207 @@ class Config(_branch):
             raise KeyError(itemname)
 
     def _set(self, name, value):
+        item = self.__dict__['_index'].get(str(name))
+        if item is not None:
+            item.value = value
+            return
         level, itemname = self.__lookup(name)
         level[itemname] = value
 
 
+_frozen_types = {}
+
+
+def _freeze(branch, name):
+    fields = tuple(dict.keys(branch))
+    try:
+        frozen = _frozen_types[(name, fields)]
+    except KeyError:
+        frozen = _frozen_types[(name, fields)] = namedtuple(
+            name, fields, rename=True)
+    return frozen(*(
+        value.value if isinstance(value, _item) else _freeze(value, name)
+        for value in dict.values(branch)
+    ))
+
+
+def _line_error(e, num):
+    """ add a config file line number to an exception's message """
+    args = e.args or ('',)
+    msg = 'line {} of config: {}'. format(num, args[0])
+    e.args = (msg,) + args[1:]
+
+
+def _parse_definition(path, filetype):
+    """ list of (line number, args, kwargs) for each definition statement """
+    definition = []
+    data = un_comment(iter_lines_from_path(path, filetype))
+    for num, line in enumerate(data, start=1):
+        if not line:
+            continue
+        try:
+            args, kwargs = to_args(line)
+        except Exception as e:
+            raise Exception(
+                'Error on line {} of definition: {}'.format(num, e)
+            )
+        definition.append((num, args, kwargs))
+    return definition
+
+
+def _load_definition(path, filetype, cache):
+    """ parsed definition statements, using a cached copy if still valid
+
+        The cache file holds a header, identifying the definition file's
+        name, modification time and size, and the parsed statements,
+        in marshal format.
+    """
+    if not cache or not isinstance(path, str):
+        return _parse_definition(path, filetype)
+    filename = normalize_path(path, filetype)
+    try:
+        stat = os.stat(filename)
+    except OSError:  # eg, a file in an archive
+        return _parse_definition(path, filetype)
+    import hashlib  # only when caching; imports openssl
+    filename = os.path.abspath(filename)
+    header = (
+        _DEFINITION_CACHE_VERSION, marshal.version,
+        filename, stat.st_mtime_ns, stat.st_size,
+    )
+    cached = os.path.join(
+        cache, hashlib.sha1(filename.encode('utf-8')).hexdigest() + '.defn')
+    try:
+        with open(cached, 'rb') as data:
+            cached_header, definition = marshal.load(data)
+        if cached_header == header:
+            return definition
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    definition = _parse_definition(filename, None)
+    try:
+        os.makedirs(cache, exist_ok=True)
+        temp = '{}.{}'.format(cached, os.getpid())
+        with open(temp, 'wb') as data:
+            marshal.dump((header, definition), data)
+        os.replace(temp, cached)  # atomic, in case of concurrent workers
+    except OSError:
+        pass
+    return definition
+
+
+_DEFINITION_CACHE_VERSION = 1
+
+
+class _Node(object):
+    __slots__ = ('children', 'callbacks')
+
+    def __init__(self):
+        self.children = {}
+        self.callbacks = []
+
+
+class _Subscriptions(object):
+    """ callbacks for names matching dot-delimited patterns
+
+        The patterns are kept in a trie, one level per name part, which
+        is searched once for each name; the result is cached until the
+        next pattern is added.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.matches = {}
+
+    def __bool__(self):
+        return bool(self.root.children)
+    __nonzero__ = __bool__
+
+    def add(self, pattern, callback):
+        node = self.root
+        for part in pattern.split('.'):
+            node = node.children.setdefault(part, _Node())
+        node.callbacks.append(callback)
+        self.matches.clear()
+
+    def notify(self, name, old, new):
+        try:
+            callbacks = self.matches[name]
+        except KeyError:
+            callbacks = self.matches[name] = []
+            self._match(self.root, name.split('.'), 0, callbacks)
+        for callback in callbacks:
+            callback(name, old, new)
+
+    def _match(self, node, parts, position, callbacks):
+        if position == len(parts):
+            callbacks.extend(node.callbacks)
+            return
+        child = node.children.get(parts[position])
+        if child:
+            self._match(child, parts, position + 1, callbacks)
+        star = node.children.get('*')
+        if star:
+            callbacks.extend(star.callbacks)  # trailing '*' matches the rest
+            if position + 1 < len(parts):
+                self._match(star, parts, position + 1, callbacks)
+
+
 class _item(object):
 
-    def __init__(self, value, validator, env):
-        self.reset(value, validator, env)
+    def __init__(self, value, validator, env, environ=None):
+        self.reset(value, validator, env, environ)
 
     def __setattr__(self, name, value):
         """ directly setting value does not respect env """
         validator = self.validator
         if value and validator:
             value = validator(value)
-        self.__dict__['value'] = value
+        self.assign((value, None, False))
 
-    def reset(self, value, validator, env):
+    def reset(self, value, validator, env, environ=None):
+        self.__dict__['default'] = value
         self.__dict__['validator'] = validator
         self.__dict__['env'] = env
-        if env:
-            value = os.getenv(env, value)
-        self.value = value
+        self.assign(self.resolve(value, None, environ))
 
-    def load(self, value):
+    def load(self, value, environ=None):
         """ enforce env > value when loading from file """
-        self.reset(
-            value,
-            validator=self.__dict__.get('validator'),
-            env=self.__dict__.get('env'),
-        )
+        self.assign(self.resolve(value, value, environ))
+
+    def unload(self, environ=None):
+        """ revert to the default value, as if never loaded from file """
+        self.assign(self.resolve(self.default, None, environ))
+
+    def resolve(self, value, raw, environ=None):
+        """ validate value, without assigning it
+
+            Return:
+                (value, raw, from_env) for the assign method, where raw
+                is the text loaded from file (None if not from file)
+        """
+        env = self.env
+        from_env = False
+        if env:
+            if environ is None:
+                environ = os.environ
+            if env in environ:
+                value = environ[env]
+                from_env = True
+        validator = self.validator
+        if value and validator:
+            value = validator(value)
+        return value, raw, from_env
+
+    def assign(self, resolved):
+        value, raw, from_env = resolved
+        old = self.__dict__.get('value', value)
+        self.__dict__['value'] = value
+        self.__dict__['raw'] = raw
+        self.__dict__['from_env'] = from_env
+        subscriptions = self.__dict__.get('subscriptions')
+        if subscriptions and old != value:
+            subscriptions.notify(self.name, old, value)
 
 
 def validate_bool(value):
@@ -313,6 +698,105 @@ class Mini(object):
         )
 
 
+class ConfigWatcher(object):
+    """ reload a Config when its config file changes
+
+        The file's modification time and size are polled every interval
+        seconds. When they change, and then stay the same for debounce
+        seconds (so that a file which is still being written is not
+        loaded), the Config's _reload method is called, and callback is
+        called with the set of changed names, if any.
+
+        Use start and stop to poll in a background thread, or call check
+        to poll from an existing loop.
+
+        Parameters:
+            config   - Config to reload
+            path     - path to configuration file (see Config._load)
+            filetype - type component of dot-delimited path
+            callback - callable(changed names)
+            interval - seconds between polls
+            debounce - seconds a change must be stable before reloading
+            error    - callable(exception) for reload errors; if None,
+                       errors are ignored. The Config keeps the values
+                       it had (see Config._reload Note 5), and the
+                       reload is tried again on a later poll
+            relaxed  - passed to Config._reload
+            ignore   - passed to Config._reload
+    """
+
+    def __init__(self, config, path='config', filetype=None, callback=None,
+                 interval=1.0, debounce=0.5, error=None, relaxed=False,
+                 ignore=False):
+        self.config = config
+        self.filename = normalize_path(path, filetype)
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.error = error
+        self.relaxed = relaxed
+        self.ignore = ignore
+        self.stat = self._stat()
+        self.pending = None  # (new stat, time first seen)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self, now=None):
+        """ poll the file once, and reload the Config if needed
+
+            Return:
+                set of changed names if the Config was reloaded, else None
+        """
+        if now is None:
+            now = time.monotonic()
+        stat = self._stat()
+        if stat == self.stat:
+            self.pending = None
+            return None
+        if self.pending is None or self.pending[0] != stat:
+            self.pending = (stat, now)
+        if now - self.pending[1] < self.debounce:
+            return None
+        self.pending = None
+        if stat is None:  # file removed; keep the current values
+            self.stat = stat
+            return None
+        changed = self.config._reload(
+            self.filename, relaxed=self.relaxed, ignore=self.ignore)
+        self.stat = stat  # only after success, so a failure is retried
+        if changed and self.callback:
+            self.callback(changed)
+        return changed
+
+    def start(self):
+        """ poll in a daemon thread """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                if self.error:
+                    self.error(e)
+
+
 if __name__ == '__main__':
     import argparse
 
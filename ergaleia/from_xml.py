@@ -3,10 +3,15 @@ The MIT License (MIT)
 
 https://github.com/robertchase/ergaleia/blob/master/LICENSE.txt
 '''
+from collections import deque, namedtuple
+import os
 import sys
+from xml.parsers import expat
 from xml.sax import make_parser
 from xml.sax.handler import ContentHandler
 
+from ergaleia.normalize_path import normalize_path
+
 PY3 = sys.version_info.major == 3
 
 if PY3:
@@ -22,18 +27,27 @@ class XmlToDict(ContentHandler):
         self.stack = [(None, {})]
 
     def startElement(self, name, attrs):
-        self.stack.append((name, {n: v for n, v in attrs.items()}))
+        if type(attrs) is not dict:  # expat supplies a new dict
+            attrs = {n: v for n, v in attrs.items()}
+        self.stack.append((name, attrs))
 
     def endElement(self, name):
         value = self.data.strip()
         self.data = ''
 
         name, collection = self.stack.pop()
-        p_name, p_collection = self.stack[-1]
 
         if not value:
             value = collection
 
+        self.addElement(name, value)
+
+    def addElement(self, name, value):
+        """ add a closed element's value to the enclosing collection
+
+            repeated names collapse into a list
+        """
+        p_name, p_collection = self.stack[-1]
         if name in p_collection:
             p_value = p_collection[name]
             if not isinstance(p_value, (list, tuple)):
@@ -46,11 +60,349 @@ class XmlToDict(ContentHandler):
         self.data += ch if PY3 else ch.encode('ascii')
 
 
-def from_xml(data, handler_class=XmlToDict):
-    if isinstance(data, str):
-        data = StringIO(data)
-    handler = handler_class()
+class XmlBufferedToDict(XmlToDict):
+    """ XmlToDict, with text accumulated as a list of chunks
+
+        Repeated str concatenation is quadratic for long text split into
+        many chunks (as expat and sax do), so chunks are joined once, in
+        endElement. While an element is open, self.data is a list.
+    """
+
+    def __init__(self):
+        XmlToDict.__init__(self)
+        self.data = []
+
+    def endElement(self, name):
+        self.data = ''.join(self.data)
+        XmlToDict.endElement(self, name)
+        self.data = []
+
+    def characters(self, ch):
+        """ leading whitespace (eg, between child elements) is dropped,
+            since the joined value is stripped anyway
+        """
+        if not self.data and ch.isspace():
+            return
+        self.data.append(ch if PY3 else ch.encode('ascii'))
+
+
+class XmlRecords(XmlBufferedToDict):
+    """ emit elements found at record_path instead of collecting them
+
+        Each matching element is appended to self.records (and not added to
+        its parent), so the caller can consume and discard it.
+    """
+
+    def __init__(self, record_path):
+        XmlBufferedToDict.__init__(self)
+        if isinstance(record_path, str):
+            record_path = record_path.split('.')
+        self.record_path = list(record_path)
+        self.records = []
+
+    def addElement(self, name, value):
+        if len(self.stack) == len(self.record_path) and \
+                [n for n, _ in self.stack[1:]] + [name] == self.record_path:
+            self.records.append(value)
+        else:
+            XmlBufferedToDict.addElement(self, name, value)
+
+
+class XmlSelect(XmlBufferedToDict):
+    """ collect only the elements on the selected dot paths
+
+        An element is collected if it is selected, is inside a selected
+        element, or is an ancestor of a selected element. Attributes and
+        characters of ancestors are ignored, as is everything about an
+        element that is not collected.
+    """
+
+    def __init__(self, select):
+        XmlBufferedToDict.__init__(self)
+        if isinstance(select, str):
+            select = [select]
+        self.selected = set()
+        self.routes = set()
+        for path in select:
+            if isinstance(path, str):
+                path = path.split('.')
+            path = tuple(path)
+            self.selected.add(path)
+            self.routes.update(path[:n] for n in range(1, len(path)))
+        self.path = ()
+        self.inside = 0  # depth of selected element enclosing current element
+        self.skip = 0  # depth inside an ignored element
+
+    def startElement(self, name, attrs):
+        if self.skip:
+            self.skip += 1
+            return
+        path = self.path + (name,)
+        if self.inside:
+            pass
+        elif path in self.selected:
+            self.inside = len(path)
+        elif path in self.routes:
+            attrs = {}
+        else:
+            self.skip = 1
+            return
+        self.path = path
+        XmlBufferedToDict.startElement(self, name, attrs)
+
+    def endElement(self, name):
+        if self.skip:
+            self.skip -= 1
+            return
+        if self.inside == len(self.path):
+            self.inside = 0
+        self.path = self.path[:-1]
+        XmlBufferedToDict.endElement(self, name)
+
+    def characters(self, ch):
+        if self.inside and not self.skip:
+            XmlBufferedToDict.characters(self, ch)
+
+
+def _sax_parser(handler):
     p = make_parser()
     p.setContentHandler(handler)
-    p.parse(data)
+    return p.feed, p.close
+
+
+def _expat_parser(handler):
+    p = expat.ParserCreate()
+    p.buffer_text = True
+    p.StartElementHandler = handler.startElement
+    p.EndElementHandler = handler.endElement
+    p.CharacterDataHandler = handler.characters
+    return p.Parse, lambda: p.Parse(b'', True)
+
+
+_ENGINES = {
+    'sax': _sax_parser,
+    'expat': _expat_parser,
+}
+
+
+def _parser(engine, handler):
+    try:
+        return _ENGINES[engine](handler)
+    except KeyError:
+        raise ValueError('invalid engine: {}'.format(engine))
+
+
+def _is_buffer(data):
+    """ True for bytes, bytearray, memoryview, mmap and the like """
+    try:
+        memoryview(data).release()
+    except TypeError:
+        return False
+    return True
+
+
+def _chunks(data, chunksize):
+    """ generate chunksize pieces of a str, buffer or file object """
+    if isinstance(data, str) or _is_buffer(data):
+        if not isinstance(data, str):
+            data = memoryview(data)
+        for start in range(0, len(data), chunksize):
+            yield data[start:start + chunksize]
+    else:
+        while True:
+            chunk = data.read(chunksize)
+            if not chunk:
+                break
+            yield chunk
+
+
+def from_xml(data, handler_class=XmlToDict, engine='sax', chunksize=65536,
+             select=None):
+    """ convert XML data into a nested dict
+
+        Parameters:
+            data          - XML data (see Note 1)
+            handler_class - ContentHandler used to build the result
+            engine        - 'sax' or 'expat' (see Note 2)
+            chunksize     - size of each read from a file object when
+                            engine is 'expat'
+            select        - dot-delimited path, or list of paths, of the
+                            elements to include in the result (see Note 3)
+
+        Notes:
+            1. The data can be a str, bytes, a memoryview, an mmap or a
+               file object. If engine is 'expat', binary data is parsed
+               without being decoded to str.
+            2. The 'expat' engine drives xml.parsers.expat directly,
+               bypassing the xml.sax layer. A parse error raises
+               xml.parsers.expat.ExpatError instead of SAXParseException.
+            3. If select is specified, only the selected elements (with
+               their contents) and their ancestors are included in the
+               result; the rest of the document is skipped as it is
+               parsed. Paths use the same syntax as nested_get, starting
+               at the document's root element. The handler_class is not
+               used.
+            4. The default handler_class (XmlToDict) is replaced with
+               XmlBufferedToDict, which builds the same result faster;
+               a subclass of XmlToDict is used as is.
+    """
+    if handler_class is XmlToDict:
+        handler_class = XmlBufferedToDict
+    handler = XmlSelect(select) if select else handler_class()
+    if engine == 'sax' and not _is_buffer(data):
+        if isinstance(data, str):
+            data = StringIO(data)
+        p = make_parser()
+        p.setContentHandler(handler)
+        p.parse(data)
+    else:
+        feed, close = _parser(engine, handler)
+        if isinstance(data, str) or _is_buffer(data):
+            feed(data)
+        else:
+            for chunk in _chunks(data, chunksize):
+                feed(chunk)
+        close()
     return handler.stack[0][1]
+
+
+def iter_xml(data, record_path, chunksize=65536, engine='sax'):
+    """ generate the dict version of each element found at record_path
+
+        Parameters:
+            data        - a string or file object containing XML data
+            record_path - dot-delimited str (or iterable) of element names,
+                          starting at the document's root element
+            chunksize   - size of each read from data
+            engine      - 'sax' or 'expat' (see from_xml)
+
+        Notes:
+            1. Each record is yielded as soon as its end tag is parsed, and
+               is not retained, so memory use is bounded by the size of a
+               record instead of the size of the document.
+            2. Records have the same shape as they would in from_xml.
+    """
+    handler = XmlRecords(record_path)
+    feed, close = _parser(engine, handler)
+    for chunk in _chunks(data, chunksize):
+        feed(chunk)
+        records, handler.records = handler.records, []
+        for record in records:
+            yield record
+    close()
+    for record in handler.records:
+        yield record
+
+
+XmlResult = namedtuple('XmlResult', 'index, value, error')
+
+
+def _portable(e):
+    """ make sure an exception can make it back from a worker process """
+    import pickle
+    try:
+        pickle.loads(pickle.dumps(e))
+    except Exception:
+        return Exception('{}: {}'.format(type(e).__name__, e))
+    return e
+
+
+def _from_xml_one(job):
+    index, source, engine = job
+    try:
+        if isinstance(source, str) and not source.lstrip().startswith('<'):
+            mode = 'rb' if engine == 'expat' else 'r'
+            with open(normalize_path(source), mode) as data:
+                value = from_xml(data, engine=engine)
+        else:
+            value = from_xml(source, engine=engine)
+    except Exception as e:
+        return XmlResult(index, None, _portable(e))
+    return XmlResult(index, value, None)
+
+
+def _from_xml_batch(jobs):
+    return [_from_xml_one(job) for job in jobs]
+
+
+def from_xml_many(sources, workers=None, chunksize=1, ordered=True,
+                  engine='sax', executor='process'):
+    """ convert many XML documents in parallel
+
+        Parameters:
+            sources   - iterable of XML documents or paths (see Note 1)
+            workers   - maximum number of workers (default: cpu count)
+            chunksize - number of documents sent to a worker at a time
+            ordered   - if True, generate results in input order; otherwise,
+                        generate results as they complete
+            engine    - 'sax' or 'expat' (see from_xml)
+            executor  - 'process' or 'thread'
+
+        Return:
+            generator of XmlResult(index, value, error) (see Note 2)
+
+        Notes:
+            1. A source is a str or bytes XML document. A str that does
+               not start with '<' is treated as a path to a file, and is
+               located using normalize_path.
+            2. The index is the position of the source in sources. If the
+               document is converted, value is the dict and error is None;
+               otherwise, value is None and error is the exception. An
+               error does not stop the conversion of other documents.
+            3. Sources are read as results are consumed; no more than
+               workers * chunksize * 2 documents are in flight at a time,
+               so sources can be an unbounded generator.
+    """
+    if executor not in ('process', 'thread'):
+        raise ValueError('invalid executor: {}'.format(executor))
+    workers = workers or os.cpu_count() or 1
+    return _from_xml_many(
+        executor, sources, workers, chunksize, ordered, engine)
+
+
+def _batches(sources, chunksize, engine):
+    batch = []
+    for index, source in enumerate(sources):
+        batch.append((index, source, engine))
+        if len(batch) == chunksize:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _from_xml_many(executor, sources, workers, chunksize, ordered, engine):
+    # imported here, since they are heavy (eg, multiprocessing)
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    pool = {
+        'process': ProcessPoolExecutor,
+        'thread': ThreadPoolExecutor,
+    }[executor]
+    window = workers * 2  # batches in flight
+    with pool(max_workers=workers) as ex:
+        pending = deque() if ordered else set()
+        for batch in _batches(sources, chunksize, engine):
+            future = ex.submit(_from_xml_batch, batch)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+            while len(pending) >= window:
+                for result in _completed(pending, ordered):
+                    yield result
+        while pending:
+            for result in _completed(pending, ordered):
+                yield result
+
+
+def _completed(pending, ordered):
+    """ results of the oldest (ordered) or first completed batch(es) """
+    if ordered:
+        done = [pending.popleft()]
+    else:
+        from concurrent.futures import FIRST_COMPLETED, wait
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        pending.difference_update(done)
+    for future in done:
+        for result in future.result():
+            yield result
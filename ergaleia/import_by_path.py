@@ -6,9 +6,36 @@ https://github.com/robertchase/spindrift/blob/master/LICENSE.txt
 import importlib
 
 
-def import_by_path(target):
+_cache = {}
+
+
+def import_by_path(target, lazy=False):
     if isinstance(target, str):
+        try:
+            return _cache[target]
+        except KeyError:
+            pass
+        if lazy:
+            return LazyImport(target)
         modnam, funnam = target.rsplit('.', 1)
         mod = importlib.import_module(modnam)
-        return getattr(mod, funnam)
+        function = _cache[target] = getattr(mod, funnam)
+        return function
     return target
+
+
+class LazyImport(object):
+    """ callable proxy that imports target when it is first called """
+
+    def __init__(self, target):
+        self.target = target
+        self.function = None
+
+    def __call__(self, *args, **kwargs):
+        function = self.function
+        if function is None:
+            function = self.function = import_by_path(self.target)
+        return function(*args, **kwargs)
+
+    def __repr__(self):
+        return 'LazyImport({!r})'.format(self.target)
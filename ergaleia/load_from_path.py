@@ -3,10 +3,14 @@ The MIT License (MIT)
 
 https://github.com/robertchase/ergaleia/blob/master/LICENSE.txt
 '''
-from ergaleia.normalize_path import normalize_path
+from functools import partial
+from io import StringIO
+import mmap as _mmap
 
+from ergaleia.normalize_path import normalize_path, split_dot_path
 
-def load_from_path(path, filetype=None, has_filetype=True):
+
+def load_from_path(path, filetype=None, has_filetype=True, mmap=False):
     """ load file content from a file specified as dot-separated
 
         The file is located according to logic in normalize_path,
@@ -16,6 +20,7 @@ def load_from_path(path, filetype=None, has_filetype=True):
             path         - dot-separated path
             filetype     - optional filetype
             has_filetype - if True, treat last dot-delimited token as filetype
+            mmap         - if True, map the file into memory (see Note 4)
 
         Notes:
             1. If path is a file-like object, then data is read directly
@@ -25,15 +30,36 @@ def load_from_path(path, filetype=None, has_filetype=True):
             3. If has_filetype is True, filetype does not have to be specified.
                If filetype is specified, has_filetype is ignored, and filetype
                must match the last dot-delimited token exactly.
+            4. If mmap is True, a read-only mmap of the file is returned
+               instead of a str. The file content is paged in by the OS
+               as it is used, and is not copied into the process. An empty
+               file returns b''. A file inside an archive (see Note 5)
+               returns a read-only memoryview of the cached content.
+            5. If a dot-separated path is located in a zip archive (eg,
+               a zipapp or zipped package), the file is read from the
+               archive using load_resource.
     """
     if not isinstance(path, str):
         try:
             return path.read()
         except AttributeError:
             return path
-    path = normalize_path(path, filetype, has_filetype)
-    with open(path) as data:
-        return data.read()
+    normalized = normalize_path(path, filetype, has_filetype)
+    try:
+        if mmap:
+            with open(normalized, 'rb') as data:
+                try:
+                    return _mmap.mmap(
+                        data.fileno(), 0, access=_mmap.ACCESS_READ)
+                except ValueError:  # can't map an empty file
+                    return b''
+        with open(normalized) as data:
+            return data.read()
+    except IOError:
+        data = _archived(path, normalized, filetype, has_filetype)
+        if data is None:
+            raise
+        return memoryview(data) if mmap else data.decode()
 
 
 def load_lines_from_path(path, filetype=None, has_filetype=True):
@@ -55,12 +81,133 @@ def load_lines_from_path(path, filetype=None, has_filetype=True):
             3. If has_filetype is True, filetype does not have to be specified.
                If filetype is specified, has_filetype is ignored, and filetype
                must match the last dot-delimited token exactly.
+            4. Files in a zip archive are supported (see load_from_path).
     """
     if not isinstance(path, str):
         try:
             return path.readlines()
         except AttributeError:
             return path
-    path = normalize_path(path, filetype)
-    with open(path) as data:
-        return data.readlines()
+    return list(iter_lines_from_path(path, filetype, has_filetype))
+
+
+def iter_lines_from_path(path, filetype=None, has_filetype=True):
+    """ generate lines from a file specified as dot-separated
+
+        The file is located according to logic in normalize_path,
+        and lines are generated one at a time, without reading the
+        whole file into memory. (See Note 1)
+
+        Parameters: (see normalize_path)
+            path         - dot-separated path
+            filetype     - optional filetype
+            has_filetype - if True, treat last dot-delimited token as filetype
+
+        Notes:
+            1. If path is not a string (eg, a file-like object or a list),
+               then lines are generated by iterating over path.
+            2. If has_filetype is True, filetype does not have to be specified.
+               If filetype is specified, has_filetype is ignored, and filetype
+               must match the last dot-delimited token exactly.
+            3. Files in a zip archive are supported (see load_from_path).
+    """
+    if not isinstance(path, str):
+        for line in path:
+            yield line
+        return
+    normalized = normalize_path(path, filetype, has_filetype)
+    try:
+        data = open(normalized)
+    except IOError:
+        content = _archived(path, normalized, filetype, has_filetype)
+        if content is None:
+            raise
+        data = StringIO(content.decode())
+    with data:
+        for line in data:
+            yield line
+
+
+async def aload_from_path(path, filetype=None, has_filetype=True, mmap=False,
+                          executor=None):
+    """ load_from_path without blocking the event loop
+
+        The file is read in a thread by loop.run_in_executor, using
+        the specified executor (or the loop's default).
+
+        Parameters: (see load_from_path)
+            executor - concurrent.futures.Executor to run in (optional)
+    """
+    import asyncio  # only needed by asyncio programs
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(
+        load_from_path, path, filetype, has_filetype, mmap))
+
+
+async def aload_lines_from_path(path, filetype=None, has_filetype=True,
+                                executor=None):
+    """ load_lines_from_path without blocking the event loop
+
+        Parameters: (see load_from_path and aload_from_path)
+    """
+    import asyncio  # only needed by asyncio programs
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(
+        load_lines_from_path, path, filetype, has_filetype))
+
+
+_resources = {}
+
+
+def load_resource(path, filetype=None, has_filetype=True):
+    """ load bytes from a package resource specified as dot-separated
+
+        The first dot-delimited token names a package, and the remaining
+        tokens locate a file inside the package, which is read using the
+        package's loader (importlib.resources). This works for packages
+        in zip archives (eg, a zipapp or zipped package) as well as for
+        packages in the file system.
+
+        Parameters: (see normalize_path)
+            path         - dot-separated path
+            filetype     - optional filetype
+            has_filetype - if True, treat last dot-delimited token as filetype
+
+        Return:
+            bytes
+
+        Notes:
+            1. Resource content is cached, so a resource is read (and
+               decompressed) only once. Use clear_resource_cache to empty
+               the cache.
+    """
+    key = (path, filetype, has_filetype)
+    try:
+        return _resources[key]
+    except KeyError:
+        pass
+    parts, extension = split_dot_path(path, filetype, has_filetype)
+    if len(parts) < 2:
+        raise ValueError('not a package resource: {}'.format(path))
+    import importlib.resources  # only needed for archived packages
+    resource = importlib.resources.files(parts[0])
+    for part in parts[1:-1]:
+        resource = resource.joinpath(part)
+    resource = resource.joinpath(parts[-1] + extension)
+    data = _resources[key] = resource.read_bytes()
+    return data
+
+
+def clear_resource_cache():
+    """ forget the content of resources read by load_resource """
+    _resources.clear()
+
+
+def _archived(path, normalized, filetype, has_filetype):
+    """ content of a dot-separated path from an archive, or None """
+    if normalized == path:  # not dot-separated
+        return None
+    try:
+        return load_resource(path, filetype, has_filetype)
+    except Exception:
+        return None
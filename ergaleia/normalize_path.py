@@ -42,24 +42,80 @@ def normalize_path(path, filetype=None, has_filetype=True):
         4. If has_filetype is True, filetype does not have to be specified.
            If filetype is specified, has_filetype is ignored, and filetype
            must match the last dot-delimited token exactly.
+        5. Dot-separated paths are resolved once, and the result is
+           cached. The cache is cleared if sys.path changes, or by
+           calling clear_path_cache.
     """
     if not isinstance(path, str):
         return path
     if '.' in path and os.path.sep not in path:  # path is dot separated
-        parts = path.split('.')
-        extension = ''
-        if len(parts) > 1:
-            if filetype and has_filetype:
-                has_filetype = False  # filetype is more specific
-            if (filetype and parts[-1] == filetype) or has_filetype:
-                extension = '.' + parts[-1]
-                parts = parts[:-1]
-            if len(parts) > 1:
-                if PY3:
-                    spec = importlib.util.find_spec(parts[0])
-                    path = list(spec.submodule_search_locations)[0]
-                else:
-                    _, path, _ = imp.find_module(parts[0])
-
-                path = os.path.join(path, *parts[1:]) + extension
+        if sys.path != _cache_sys_path:
+            _cache.clear()
+            _cache_sys_path[:] = sys.path
+        key = (path, filetype, has_filetype)
+        try:
+            return _cache[key]
+        except KeyError:
+            path = _cache[key] = _normalize_dot_path(
+                path, filetype, has_filetype)
+    return path
+
+
+_cache = {}
+_cache_sys_path = []
+
+
+def clear_path_cache():
+    """ forget the dot-separated paths resolved by normalize_path
+
+        Call this if packages move without a change to sys.path.
+    """
+    _cache.clear()
+
+
+def prewarm_path_cache(paths, filetype=None, has_filetype=True):
+    """ resolve a list of dot-separated paths ahead of time
+
+        Parameters: (see normalize_path)
+
+            paths        - iterable of paths to convert
+            filetype     - don't include as part of path if present as last
+                           token
+            has_filetype - if True, treat last dot-delimited token as filetype
+    """
+    for path in paths:
+        normalize_path(path, filetype, has_filetype)
+
+
+def split_dot_path(path, filetype=None, has_filetype=True):
+    """ split a dot-separated path into its parts and file extension
+
+        Parameters: (see normalize_path)
+
+        Return:
+            tuple of:
+                list of dot-separated parts, without filetype
+                extension (eg, '.txt'), or ''
+    """
+    parts = path.split('.')
+    extension = ''
+    if len(parts) > 1:
+        if filetype and has_filetype:
+            has_filetype = False  # filetype is more specific
+        if (filetype and parts[-1] == filetype) or has_filetype:
+            extension = '.' + parts[-1]
+            parts = parts[:-1]
+    return parts, extension
+
+
+def _normalize_dot_path(path, filetype, has_filetype):
+    parts, extension = split_dot_path(path, filetype, has_filetype)
+    if len(parts) > 1:
+        if PY3:
+            spec = importlib.util.find_spec(parts[0])
+            path = list(spec.submodule_search_locations)[0]
+        else:
+            _, path, _ = imp.find_module(parts[0])
+
+        path = os.path.join(path, *parts[1:]) + extension
     return path
@@ -0,0 +1,168 @@
+'''
+The MIT License (MIT)
+
+https://github.com/robertchase/ergaleia/blob/master/LICENSE.txt
+'''
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import pickle
+import struct
+import time
+
+from ergaleia.config import Config
+
+
+_HEADER = struct.Struct('QQ')  # version, payload length
+_WORD = struct.Struct('Q')
+
+
+class SharedConfig(object):
+    """ share a Config snapshot between processes
+
+        A publishing process creates a shared memory segment and
+        publishes a (validated) Config into it. Worker processes attach
+        to the segment by name, and refresh their copy of the Config only
+        when the published version changes, so a reload is parsed and
+        validated once instead of once per worker.
+
+            # publisher
+            shared = SharedConfig.create()
+            shared.publish(config)
+
+            # worker (given shared.name)
+            shared = SharedConfig(name)
+            if shared.refresh():
+                use(shared.config)
+
+        Notes:
+
+            1. A published Config is a snapshot of the key names and
+               values (see Config._as_dict), which are pickled into the
+               segment. A worker's Config has no validators or env
+               settings.
+
+            2. The version is even when the segment is stable, and odd
+               while a publish is in progress. A worker re-reads the
+               segment if the version changes while it is reading, so it
+               never sees a partial snapshot. A worker waits (up to the
+               refresh timeout) for a publish in progress to finish.
+
+            3. The segment is sized when it is created, and a publish
+               that does not fit raises ValueError.
+    """
+
+    def __init__(self, name, _shm=None):
+        if _shm is None:
+            _shm = _attach(name)
+        self.shm = _shm
+        self.name = _shm.name
+        self.version = 0
+        self.config = None
+
+    @classmethod
+    def create(cls, size=65536, name=None):
+        """ create a new shared memory segment for publishing """
+        shm = SharedMemory(name=name, create=True, size=_HEADER.size + size)
+        _created.add(shm._name)
+        _HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm.name, shm)
+
+    def publish(self, config):
+        """ publish a snapshot of config, and return the new version """
+        payload = pickle.dumps(config._as_dict, pickle.HIGHEST_PROTOCOL)
+        end = _HEADER.size + len(payload)
+        if end > self.shm.size:
+            raise ValueError(
+                'config ({} bytes) too large for shared memory ({} bytes)'
+                .format(len(payload), self.shm.size - _HEADER.size)
+            )
+        buf = self.shm.buf
+        version, _ = _HEADER.unpack_from(buf)
+        # odd: publish in progress; only the version changes at the end.
+        # header words are copied in whole, since struct.pack_into zeroes
+        # its target before packing, and a reader could see version 0
+        buf[0:8] = _WORD.pack(version + 1)
+        buf[8:16] = _WORD.pack(len(payload))
+        buf[_HEADER.size:end] = payload
+        buf[0:8] = _WORD.pack(version + 2)
+        return version + 2
+
+    def refresh(self, timeout=1.0):
+        """ update self.config if a new version has been published
+
+            Parameters:
+                timeout - seconds to wait for a publish in progress
+
+            Return:
+                the new Config, or None if the version has not changed
+
+            Notes:
+                1. If a publish is still in progress after timeout seconds
+                   (for instance, the publisher died part way through),
+                   None is returned and self.config is not changed.
+        """
+        buf = self.shm.buf.toreadonly()
+        expires = time.monotonic() + timeout
+        try:
+            while True:
+                header = _HEADER.unpack_from(buf)
+                version, length = header
+                if version == self.version:
+                    return None
+                if version % 2:
+                    if time.monotonic() > expires:
+                        return None
+                    time.sleep(0.001)
+                    continue
+                payload = bytes(buf[_HEADER.size:_HEADER.size + length])
+                if _HEADER.unpack_from(buf) == header:
+                    break
+        finally:
+            buf.release()
+        config = Config()
+        for key, value in pickle.loads(payload).items():
+            config._define(key, value)
+        self.version = version
+        self.config = config
+        return config
+
+    def close(self):
+        """ stop using the segment in this process """
+        self.shm.close()
+
+    def unlink(self):
+        """ destroy the segment (publisher only) """
+        self.shm.unlink()
+
+
+def _attach(name):
+    """ attach to an existing segment without taking ownership of it
+
+        Before python 3.13, every SharedMemory registers with the
+        resource tracker, which unlinks the segment when the tracker
+        exits; only the creator should do that. A process with its own
+        tracker (eg, a spawned worker) unregisters the segment. A
+        process sharing the creator's tracker (the creator itself, or a
+        forked worker) leaves the registration alone, since the tracker
+        keeps only one registration per name.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+        if not _inherited_tracker and shm._name not in _created:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+_created = set()  # names of segments created in this process
+_inherited_tracker = False
+
+
+def _after_fork():
+    global _inherited_tracker
+    _inherited_tracker = resource_tracker._resource_tracker._fd is not None
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -3,9 +3,23 @@ The MIT License (MIT)
 
 https://github.com/robertchase/ergaleia/blob/master/LICENSE.txt
 """
+from functools import lru_cache
 import re
 
 
+# one token per match, scanning left to right. quoted values are tried
+# before blank-delimited ones, so that a key never reaches into a quoted
+# value that contains an equal (eg, a='x=y')
+_TOKEN = re.compile(r"""
+      ([^\s'"]+)\s*=\s*"((?:[^"]|"")*)"(?=\s|$)
+    | ([^\s'"]+)\s*=\s*'((?:[^']|'')*)'(?=\s|$)
+    | "((?:[^"]|"")*)"(?=\s|$)
+    | '((?:[^']|'')*)'(?=\s|$)
+    | ([^\s'"]+)\s*=\s*(\S+)
+    | (\S+)
+""", re.VERBOSE)
+
+
 def to_args(line):
     """Tokenize line into kwargs and ordered args
 
@@ -42,56 +56,69 @@ def to_args(line):
                 other values are str.
      """
 
+    args = []
     kwargs = {}
-
-    # extract a="b" a='b' a=b
-    pats = (('"', r'(\S+)\s*=\s*"(([^"]|"")*)"(\s|$)'),
-            ("'", r"(\S+)\s*=\s*'(([^']|'')*)'(\s|$)"),
-            ('', r'(\S+)\s*=\s*(\S+)'))
-    for delim, pat in pats:
-        while True:
-            res = re.search(pat, line)
-            if not res:
-                break
-            value = res.group(2).replace(delim*2, delim)
-            if not delim and value.isdigit():  # convert if unquoted number
-                value = int(value)
-            kwargs[res.group(1)] = value
-            line = line[:res.start()] + line[res.end():]
-
-    args = _to_args(line)
+    for token in _TOKEN.finditer(line):
+        dkey, dvalue, skey, svalue, double, single, key, value, arg = \
+            token.groups()
+        if dvalue is not None:
+            kwargs[dkey] = dvalue.replace('""', '"')
+        elif svalue is not None:
+            kwargs[skey] = svalue.replace("''", "'")
+        elif double is not None:
+            args.append(double.replace('""', '"'))
+        elif single is not None:
+            args.append(single.replace("''", "'"))
+        elif key is not None:
+            kwargs[key] = int(value) if value.isdigit() else value
+        else:
+            args.append(int(arg) if arg.isdigit() else arg)
 
     return args, kwargs
 
 
-def _to_args(line, args=None):
-    """tokenize line into an ordered list of args"""
-
-    if args is None:
-        args = []
-
-    # extract '...' "..."
-    pats = (("'", r"'(([^']|'')*)'(\s|$)"),
-            ('"', r'"(([^"]|"")*)"(\s|$)'))
-    for delim, pat in pats:
-        res = re.search(pat, line)
-        if not res:
-            continue
-        # preserve order: _to_args(left) + match + _to_args(right)
-        args.extend(_to_args(line[:res.start()]))
-        value = res.group(1).replace(delim*2, delim)
-        args.append(value)  # these are quoted, so no int conversion
-        args.extend(_to_args(line[res.end():]))
-        break
-
-    if not args:
-        # if we didn't find delimited strings, then tokenize by whitespace
-        for arg in line.split():
-            if arg.isdigit():
-                arg = int(arg)
-            args.append(arg)
-
-    return args
+def make_to_args_cache(maxsize=1024, max_line=1024):
+    """Create a memoizing version of to_args
+
+         Parameters:
+
+             maxsize  - maximum number of cached lines; least recently
+                        used lines are evicted first
+             max_line - lines longer than this are parsed, but not cached
+
+         Return:
+
+             callable with the same signature and results as to_args
+
+         Notes:
+
+             1. Each call returns a new list and dict, so a caller can
+                change the result without affecting the cache.
+
+             2. The callable has cache_info and cache_clear methods (see
+                functools.lru_cache) for hit/miss statistics and reset.
+
+             3. The maxsize and max_line bounds limit the memory that
+                can be used by the cache, even with untrusted input.
+     """
+
+    @lru_cache(maxsize=maxsize)
+    def _cached(line):
+        args, kwargs = to_args(line)
+        return tuple(args), tuple(kwargs.items())
+
+    def cached(line):
+        if len(line) > max_line:
+            return to_args(line)
+        args, kwargs = _cached(line)
+        return list(args), dict(kwargs)
+
+    cached.cache_info = _cached.cache_info
+    cached.cache_clear = _cached.cache_clear
+    return cached
+
+
+to_args_cached = make_to_args_cache()
 
 
 if __name__ == '__main__':
@@ -3,11 +3,42 @@ The MIT License (MIT)
 
 https://github.com/robertchase/ergaleia/blob/master/LICENSE.txt
 '''
+from functools import lru_cache
 import re
 
 
+@lru_cache(maxsize=64)
+def make_un_commenter(comment='#', strip=True):
+    """Create an un_comment function for a single string
+
+       The comment patterns are compiled once, and cached by comment and
+       strip, so repeated calls with the same arguments are cheap.
+
+       Parameters:
+           comment - comment character or characters (default=#)
+           strip   - strip line after uncomment (default=True)
+
+       Return:
+           callable which uncomments a string (see un_comment)
+    """
+    escaped = re.escape(comment)
+    split = re.compile(r'(?<!\\)' + escaped).split
+    unescape = re.compile(r'\\' + escaped).sub
+    replacement = comment.replace('\\', '\\\\')
+
+    def _un_comment(string):
+        if comment in string:
+            string = split(string, maxsplit=1)[0]
+            if '\\' in string:
+                string = unescape(replacement, string)
+        if strip:
+            return string.strip()
+        return string
+    return _un_comment
+
+
 def un_comment(s, comment='#', strip=True):
-    """Uncomment a string or list of strings
+    """Uncomment a string, list of strings or iterable of strings
 
        truncate s at first occurrence of a non-escaped comment character
        remove escapes from escaped comment characters
@@ -22,15 +53,14 @@ def un_comment(s, comment='#', strip=True):
            2. If a tuple or list is provided, a list of the same length will
               be returned, with each string in the list uncommented. Some
               lines may be zero length.
+           3. The comment can be more than one character (eg, //).
+           4. If any other iterable (eg, an open file) is provided, a
+              generator of uncommented strings is returned. The iterable
+              is consumed lazily, one line at a time.
     """
-
-    def _un_comment(string):
-        result = re.split(r'(?<!\\)' + comment, string, maxsplit=1)[0]
-        result = re.sub(r'\\' + comment, comment, result)
-        if strip:
-            return result.strip()
-        return result
-
+    _un_comment = make_un_commenter(comment, strip)
+    if isinstance(s, str):
+        return _un_comment(s)
     if isinstance(s, (tuple, list)):
         return [_un_comment(line) for line in s]
-    return _un_comment(s)
+    return (_un_comment(line) for line in s)
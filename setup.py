@@ -1,10 +1,10 @@
-from setuptools import find_packages
-from distutils.core import setup
+from setuptools import find_packages, setup
 
 setup(
     name='ergaleia',
     version='1.3.2',
     packages=find_packages(exclude=['tests']),
+    python_requires='>=3.9',
     description='A library of random tools',
     long_description="""
 Documentation
@@ -4,14 +4,14 @@
 #
 # to override default directories and names, set env variables:
 #     TEST_GIT - location of git directory where ergaleia is cloned ($HOME/git)
-#     TEST_IMAGE - name of python3.6 docker image (bob/python3.6)
+#     TEST_IMAGE - name of python3.9 docker image (bob/python3.9)
 #
 # assumes: 1. docker is running
-#          2. a python3.6+ image is available ($TEST_IMAGE below)
+#          2. a python3.9+ image is available ($TEST_IMAGE below)
 #             with pytest installed
 #
 TEST_GIT=${TEST_GIT:-$HOME/git}
-TEST_IMAGE=${TEST_IMAGE:-bob/python3.6}
+TEST_IMAGE=${TEST_IMAGE:-bob/python3.9}
 
 CMD=${*:-tests}
 GIT=/opt/git
@@ -4,3 +4,7 @@ def test_a():
 
 def test_b(value):
     return value * 10
+
+
+def test_c(value):
+    return value * 100
@@ -1,5 +1,10 @@
+import asyncio
+from io import StringIO
+import os
 import pytest
-from ergaleia import Config, validate_bool
+import threading
+from ergaleia import Config, ConfigWatcher, validate_bool
+from ergaleia import config
 
 
 @pytest.mark.parametrize('value,expected', [
@@ -187,3 +192,360 @@ def test_repr(value, expected):
 def test_as_dict(value, expected):
     cfg = Config(value)
     assert cfg._as_dict == expected
+
+
+def test_load_file():
+    cfg = Config(StringIO('foo\nbar value=1 validator=int\n'))
+    cfg._load(StringIO('foo=abc # comment\n\nbar=2\n'))
+    assert cfg.foo == 'abc'
+    assert cfg.bar == 2
+
+
+def test_aload():
+    a = Config(['foo'])
+    b = Config(['bar validator=int'])
+
+    async def load():
+        return await asyncio.gather(
+            a._aload(['foo=1']),
+            b._aload(StringIO('bar=2\n')),
+        )
+    assert asyncio.run(load()) == [a, b]
+    assert a.foo == '1'
+    assert b.bar == 2
+
+
+def test_define_from_path_lazy():
+    c = Config([
+        'foo validator=tests.test_config.double',
+        'bar validator=tests.test_config.nope',
+    ], lazy=True)
+    c.foo = 'a'
+    assert c.foo == 'aa'
+    with pytest.raises(AttributeError):
+        c.bar = 'a'
+
+
+def test_define_from_path_invalid_validator():
+    with pytest.raises(Exception) as e:
+        Config(['bar validator=tests.test_config.nope'])
+    assert 'Invalid validator' in str(e.value)
+
+
+def test_define_branch_leaf_errors():
+    c = Config(['a.b 1'])
+    with pytest.raises(Exception) as e:
+        c._define('a')
+    assert 'branch node' in str(e.value)
+    with pytest.raises(Exception) as e:
+        c._define('a.b.c')
+    assert 'leaf node' in str(e.value)
+    assert c._ordered_keys == ['a.b']
+
+
+def test_redefine():
+    c = Config(['a.b 1', 'c 2'])
+    c._define('a.b', 3)
+    assert c.a.b == 3
+    assert c._ordered_keys == ['a.b', 'c']
+
+
+def test_get_branch():
+    c = Config(['a.b.c 1'])
+    assert c._get('a.b').c == 1
+    assert c._get('a.b.c') == 1
+    c._set('a.b.c', 2)
+    assert c.a.b.c == 2
+    with pytest.raises(AttributeError):
+        c._set('a.b', 3)
+
+
+def test_load_undefined_nested():
+    c = Config(['a.b'])
+    with pytest.raises(KeyError):
+        c._load(['a.c=1'])
+    c._load(['a.c=1', 'a.b=2'], ignore=True)
+    assert c.a.b == '2'
+
+
+def test_freeze():
+    c = Config(['server.port 1234', 'server.host localhost', 'debug', '10 a'])
+    frozen = c._freeze()
+    assert frozen.server.port == 1234
+    assert frozen.server.host == 'localhost'
+    assert frozen.debug is None
+    assert frozen._2 == 'a'
+    with pytest.raises(AttributeError):
+        frozen.server.port = 1
+    c.server.port = 2
+    assert frozen.server.port == 1234
+    assert c._freeze().server.port == 2
+    assert type(c._freeze()) is type(frozen)
+
+
+def test_define_from_path_cache(tmp_path, monkeypatch):
+    defn = tmp_path / 'defn'
+    defn.write_text('foo value=bar\nbar value=10 validator=int # count\n')
+    cache = tmp_path / 'cache'
+    c = Config(str(defn), cache=str(cache))
+    assert (c.foo, c.bar) == ('bar', 10)
+    assert len(list(cache.iterdir())) == 1
+
+    def no_parse(line):
+        raise AssertionError('parsed')
+    monkeypatch.setattr(config, 'to_args', no_parse)
+    c = Config(str(defn), cache=str(cache))
+    assert (c.foo, c.bar) == ('bar', 10)
+
+    monkeypatch.undo()
+    defn.write_text('foo value=rab\n')
+    c = Config(str(defn), cache=str(cache))
+    assert c.foo == 'rab'
+    assert c._ordered_keys == ['foo']
+
+
+def test_define_from_path_cache_corrupt(tmp_path):
+    defn = tmp_path / 'defn'
+    defn.write_text('foo value=bar\n')
+    cache = tmp_path / 'cache'
+    Config(str(defn), cache=str(cache))
+    cached, = cache.iterdir()
+    cached.write_bytes(b'junk')
+    assert Config(str(defn), cache=str(cache)).foo == 'bar'
+
+
+def test_define_from_path_cache_list(tmp_path):
+    c = Config(['foo value=bar'], cache=str(tmp_path))
+    assert c.foo == 'bar'
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def reloadable():
+    c = Config([
+        'a value=1 validator=int',
+        'b value=2 validator=int',
+        'c value=3 validator=int',
+        'd',
+    ])
+    c._load(['a=10', 'b=20'])
+    return c
+
+
+def test_reload(reloadable, monkeypatch):
+    calls = []
+
+    def counting_int(value):
+        calls.append(value)
+        return int(value)
+    for key, default in (('a', 1), ('b', 2), ('c', 3)):
+        reloadable._define(key, default, counting_int)
+    reloadable._load(['a=10', 'b=20'])
+    del calls[:]
+    changed = reloadable._reload(['a=10', 'c=30', '# b=20'])
+    assert changed == {'b', 'c'}
+    assert (reloadable.a, reloadable.b, reloadable.c) == (10, 2, 30)
+    assert calls == [2, '30']
+
+
+def test_reload_same_value(reloadable):
+    assert reloadable._reload(['a = 10', 'b=020']) == set()
+    assert reloadable.b == 20
+
+
+def test_reload_undefined(reloadable):
+    with pytest.raises(KeyError) as e:
+        reloadable._reload(['a=1', 'x=2'])
+    assert 'line 2 of config' in str(e.value)
+    assert reloadable.a == 10
+    assert reloadable._reload(['a=1', 'x=2'], ignore=True) == {'a', 'b'}
+    assert reloadable._reload(['x=2'], relaxed=True) == {'x'}
+    assert reloadable.x == '2'
+
+
+def test_reload_keeps_direct_set(reloadable):
+    reloadable.d = 'direct'
+    assert reloadable._reload(['a=10', 'b=20']) == set()
+    assert reloadable.d == 'direct'
+
+
+def test_reload_error(reloadable):
+    with pytest.raises(ValueError) as e:
+        reloadable._reload(['a=11', 'b=x'])
+    assert 'line 2 of config' in str(e.value)
+    assert (reloadable.a, reloadable.b) == (10, 20)  # nothing applied
+
+
+def test_reload_after_direct_set(reloadable):
+    reloadable.a = 99
+    assert reloadable._reload(['a=10', 'b=20']) == {'a'}
+    assert reloadable.a == 10
+
+
+def test_watcher(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text('a=10\n')
+    c = Config(['a value=1 validator=int'])._load(str(path))
+    changes = []
+    watcher = ConfigWatcher(c, str(path), callback=changes.append, debounce=2)
+    assert watcher.check(now=0) is None
+    path.write_text('a=20\n')
+    os.utime(str(path), ns=(0, 10**9))
+    assert watcher.check(now=0) is None
+    assert watcher.check(now=1) is None
+    assert c.a == 10
+    assert watcher.check(now=2) == {'a'}
+    assert c.a == 20
+    assert changes == [{'a'}]
+    assert watcher.check(now=10) is None
+
+
+def test_watcher_retries_error(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text('a=10\n')
+    c = Config(['a value=1 validator=int'])._load(str(path))
+    watcher = ConfigWatcher(c, str(path), debounce=0)
+    path.write_text('a=x\n')
+    os.utime(str(path), ns=(0, 10**9))
+    with pytest.raises(ValueError):
+        watcher.check(now=0)
+    assert c.a == 10
+    with pytest.raises(ValueError):
+        watcher.check(now=1)  # not forgotten
+    path.write_text('a=30\n')
+    os.utime(str(path), ns=(0, 10**9))
+    assert watcher.check(now=2) == {'a'}
+    assert c.a == 30
+
+
+def test_watcher_thread(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text('a=10\n')
+    c = Config(['a value=1 validator=int'])._load(str(path))
+    changed = threading.Event()
+    watcher = ConfigWatcher(
+        c, str(path), callback=lambda names: changed.set(),
+        interval=.01, debounce=0,
+    ).start()
+    try:
+        path.write_text('a=200\n')
+        os.utime(str(path), ns=(0, 10**9))
+        assert changed.wait(5)
+        assert c.a == 200
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize('pattern,expected', [
+    ('db.host', ['db.host']),
+    ('db.*', ['db.host', 'db.pool.size']),
+    ('db.*.size', ['db.pool.size']),
+    ('*.host', ['db.host', 'web.host']),
+    ('*', ['db.host', 'db.pool.size', 'web.host', 'debug']),
+    ('db', []),
+    ('web.*.x', []),
+])
+def test_on_change(pattern, expected):
+    c = Config(['db.host', 'db.pool.size', 'web.host', 'debug'])
+    changes = []
+    c._on_change(pattern, lambda *args: changes.append(args))
+    c.db.host = 'a'
+    c._set('db.pool.size', 'b')
+    c._load(['web.host=c'])
+    c['debug'] = 'd'
+    values = {'db.host': 'a', 'db.pool.size': 'b', 'web.host': 'c',
+              'debug': 'd'}
+    assert changes == [(name, None, values[name]) for name in expected]
+
+
+def test_on_change_only_when_changed():
+    c = Config(['a value=1 validator=int'])
+    changes = []
+    c._on_change('a', lambda *args: changes.append(args))
+    c.a = '1'
+    c._load(['a=2'])
+    c._reload(['a=2'])
+    c._reload([])
+    assert changes == [('a', 1, 2), ('a', 2, 1)]
+
+
+def test_on_change_multiple():
+    c = Config(['a.b'])
+    changes = []
+    c._on_change('a.b', lambda *args: changes.append('exact'))
+    c._on_change('a.*', lambda *args: changes.append('star'))
+    c.a.b = 1
+    assert sorted(changes) == ['exact', 'star']
+
+
+def test_environ():
+    c = Config(environ={'FOO': '1234'})
+    c._define('foo', 10, int, 'FOO')
+    c._define('bar', 20, int, 'BAR')
+    assert c.foo == 1234
+    assert c._env_overridden == {'foo'}
+    c._load(['foo=100', 'bar=200'])
+    assert c.foo == 1234
+    assert c.bar == 200
+    c._load(['foo=100', 'bar=200'], environ={'BAR': '5'})
+    assert c.foo == 100
+    assert c.bar == 5
+    assert c._env_overridden == {'bar'}
+    c.bar = 6  # directly setting wins, and is not from env
+    assert c._env_overridden == set()
+
+
+def test_environ_snapshot(monkeypatch):
+    monkeypatch.setenv('ERGALEIA_TEST_FOO', '1')
+    c = Config()
+    c._define('foo', 10, int, 'ERGALEIA_TEST_FOO')
+    c._define('bar', 20, int)
+    lookups = []
+
+    class Environ(dict):
+        def __contains__(self, key):
+            lookups.append(key)
+            return dict.__contains__(self, key)
+
+    monkeypatch.setattr(config.os, 'environ', Environ(os.environ))
+    c._load(['foo=2', 'bar=3'])
+    assert lookups == []  # resolved against a snapshot
+    assert c.foo == 1
+    assert c._env_overridden == {'foo'}
+
+
+def test_define_from_path_environ_snapshot(monkeypatch):
+    monkeypatch.setenv('ERGALEIA_TEST_FOO', '1')
+    lookups = []
+
+    class Environ(dict):
+        def __contains__(self, key):
+            lookups.append(key)
+            return dict.__contains__(self, key)
+
+    monkeypatch.setattr(config.os, 'environ', Environ(os.environ))
+    c = Config([
+        'foo value=10 validator=int env=ERGALEIA_TEST_FOO',
+        'bar value=20 validator=int env=ERGALEIA_TEST_BAR',
+    ])
+    assert lookups == []  # resolved against a snapshot
+    assert (c.foo, c.bar) == (1, 20)
+    assert c._env_overridden == {'foo'}
+    c = Config(['foo value=10 env=FOO'], environ={'FOO': 'x'})
+    assert c.foo == 'x'
+
+
+def test_reload_environ():
+    c = Config()
+    c._define('foo', 10, int, 'FOO')
+    c._define('bar', 20, int)
+    c._load(['foo=1', 'bar=2'], environ={})
+    assert c._reload(['foo=1', 'bar=2'], environ={'FOO': '3'}) == {'foo'}
+    assert c.foo == 3
+    assert c._reload(['foo=1', 'bar=2'], environ={}) == {'foo'}
+    assert c.foo == 1
+
+
+def test_define_quoted_equal():
+    c = Config(['url value="http://h/?a=b"'])
+    assert c.url == 'http://h/?a=b'
@@ -1,9 +1,14 @@
+import itertools
+import mmap
 import pytest
 import xml
+from io import BytesIO, StringIO
+from xml.parsers import expat
 
-from ergaleia import from_xml
+from ergaleia import from_xml, from_xml_many, iter_xml
 from ergaleia import load_from_path
 from ergaleia import normalize_path
+from ergaleia.from_xml import XmlToDict
 
 
 def test_empty():
@@ -26,6 +31,20 @@ def test_simple(value, length, content):
     assert c == content
 
 
+class Upper(XmlToDict):
+    """ a subclass relying on self.data being a str """
+
+    def characters(self, ch):
+        self.data = self.data + ch.upper()
+
+
+@pytest.mark.parametrize('engine', ['sax', 'expat'])
+def test_handler_class_data(engine):
+    value = '<a><b>x<![CDATA[y]]>z</b></a>'
+    assert from_xml(value, engine=engine) == {'a': {'b': 'xyz'}}
+    assert from_xml(value, Upper, engine) == {'a': {'b': 'XYZ'}}
+
+
 @pytest.mark.parametrize('data', [
     (load_from_path('tests.from_xml.data', 'data')),
     (open(normalize_path('tests.from_xml.data', 'data'))),
@@ -40,3 +59,147 @@ def test_parts(data):
     assert len(p) == 4
     item = [part for part in p if part['ITEM'] == 'Motherboard'][0]
     assert item['MANUFACTURER'] == 'ASUS'
+
+
+def test_iter_xml():
+    data = load_from_path('tests.from_xml.data', 'data')
+    parts = list(iter_xml(data, 'PARTS.PART'))
+    assert parts == from_xml(data)['PARTS']['PART']
+
+
+def test_iter_xml_small_chunks():
+    data = '<a><b x="1"><c>one</c></b><d/><b>two</b></a>'
+    parts = list(iter_xml(StringIO(data), ('a', 'b'), chunksize=3))
+    assert parts == [{'x': '1', 'c': 'one'}, 'two']
+
+
+def test_iter_xml_no_match():
+    assert list(iter_xml('<a><b>1</b></a>', 'a.c')) == []
+
+
+def test_large_text():
+    """ multi-megabyte text node delivered by expat in many small chunks """
+    chunk = 'abcdefghi&amp;'
+    d = from_xml(StringIO('<a>\n  <b>{}</b>\n</a>'.format(chunk * 200000)))
+    assert d == {'a': {'b': 'abcdefghi&' * 200000}}
+
+
+def test_whitespace_between_children():
+    d = from_xml('<a>\n  <b> x y </b>\n  <c/>\n</a>')
+    assert d == {'a': {'b': 'x y', 'c': {}}}
+
+
+def test_expat_empty():
+    with pytest.raises(expat.ExpatError):
+        from_xml('', engine='expat')
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        from_xml('<a/>', engine='akk')
+
+
+@pytest.mark.parametrize('value', [
+    '<simple></simple>',
+    '<simple>words</simple>',
+    '<simple><a x="1"></a><b>doh</b><b>re</b></simple>',
+    '<simple>\n  <a>one &amp; two</a>\n</simple>',
+])
+def test_expat_simple(value):
+    expected = from_xml(value)
+    assert from_xml(value, engine='expat') == expected
+    data = value.encode('utf-8')
+    assert from_xml(data, engine='expat') == expected
+    assert from_xml(memoryview(data), engine='expat') == expected
+    assert from_xml(BytesIO(data), engine='expat', chunksize=3) == expected
+    assert from_xml(StringIO(value), engine='expat', chunksize=3) == expected
+
+
+def test_expat_mmap():
+    path = normalize_path('tests.from_xml.data', 'data')
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert from_xml(data, engine='expat') == from_xml(open(path))
+        data.close()
+
+
+def test_iter_xml_expat():
+    data = load_from_path('tests.from_xml.data', 'data')
+    parts = list(iter_xml(data.encode('utf-8'), 'PARTS.PART', 50, 'expat'))
+    assert parts == from_xml(data)['PARTS']['PART']
+
+
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_from_xml_many(executor):
+    sources = [
+        '<a>1</a>',
+        'tests.from_xml.data',
+        '<a>',
+        b'<b><c>2</c></b>',
+    ]
+    results = list(from_xml_many(
+        sources, workers=2, chunksize=2, executor=executor))
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert results[0].value == {'a': '1'}
+    assert results[1].value == from_xml(open(
+        normalize_path('tests.from_xml.data', 'data')))
+    assert results[2].value is None
+    assert isinstance(results[2].error, Exception)
+    assert results[3] == (3, {'b': {'c': '2'}}, None)
+
+
+def test_from_xml_many_unordered():
+    sources = ['<a>{}</a>'.format(n) for n in range(20)]
+    results = list(from_xml_many(
+        sources, workers=2, chunksize=3, ordered=False, engine='expat'))
+    assert sorted(r.index for r in results) == list(range(20))
+    for r in results:
+        assert r.value == {'a': str(r.index)}
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_from_xml_many_streams(ordered):
+    read = []
+
+    def sources():
+        for n in itertools.count():
+            read.append(n)
+            yield '<a>{}</a>'.format(n)
+
+    results = from_xml_many(
+        sources(), workers=2, chunksize=3, ordered=ordered,
+        executor='thread')
+    first = [next(results) for _ in range(5)]
+    assert len(read) <= 2 * 3 * 2 + 3
+    results.close()
+    for r in first:
+        assert r.value == {'a': str(r.index)}
+    if ordered:
+        assert [r.index for r in first] == list(range(5))
+
+
+def test_from_xml_many_executor():
+    with pytest.raises(ValueError):
+        from_xml_many([], executor='fiber')
+
+
+@pytest.mark.parametrize('engine', ['sax', 'expat'])
+@pytest.mark.parametrize('select,expected', [
+    ('a.b.c', {'a': {'b': {'c': '1'}}}),
+    (['a.b.c', 'a.d'], {'a': {'b': {'c': '1'}, 'd': {'y': '2', 'e': 'f'}}}),
+    ('a.d', {'a': {'d': {'y': '2', 'e': 'f'}}}),
+    ('a.g', {'a': {'g': ['3', '4']}}),
+    ('a.z', {'a': {}}),
+    ('z', {}),
+])
+def test_select(engine, select, expected):
+    data = '''<a x="1">text<b><c>1</c><q>0</q></b>
+                <d y="2"><e>f</e></d><g>3</g><g>4</g></a>'''
+    assert from_xml(data, engine=engine, select=select) == expected
+
+
+def test_select_parts():
+    data = load_from_path('tests.from_xml.data', 'data')
+    d = from_xml(data, select='PARTS.PART.ITEM')
+    assert d['PARTS']['PART'][0] == {'ITEM': 'Motherboard'}
+    assert len(d['PARTS']['PART']) == 4
@@ -1,6 +1,6 @@
 import pytest
 
-from ergaleia import import_by_path
+from ergaleia import LazyImport, import_by_path
 
 
 IMPORT = 'tests.import_by_path_data'
@@ -19,3 +19,28 @@ def test__aa():
 def test_b():
     fn = import_by_path('{}.test_b'.format(IMPORT))
     assert fn(100) == 1000
+
+
+def test_cache():
+    path = '{}.test_b'.format(IMPORT)
+    assert import_by_path(path) is import_by_path(path)
+
+
+def test_lazy():
+    fn = import_by_path('{}.test_c'.format(IMPORT), lazy=True)
+    assert isinstance(fn, LazyImport)
+    assert fn.function is None
+    assert fn(2) == 200
+    assert fn.function is import_by_path('{}.test_c'.format(IMPORT))
+    assert import_by_path('{}.test_c'.format(IMPORT), lazy=True) is \
+        fn.function
+
+
+def test_lazy_error():
+    fn = import_by_path('{}.test_aa'.format(IMPORT), lazy=True)
+    with pytest.raises(AttributeError):
+        fn()
+
+
+def test_non_string():
+    assert import_by_path(test_a) is test_a
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import pytest
+
+import ergaleia
+
+
+def importtime(statement):
+    """ modules imported, and their cumulative time (usec), by statement """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            try:
+                times[name.strip()] = int(cumulative)
+            except ValueError:  # header
+                pass
+    return times
+
+
+def test_import_is_lazy():
+    times = importtime('import ergaleia')
+    assert 'ergaleia' in times
+    assert not [name for name in times if name.startswith('ergaleia.')]
+
+
+def test_config_does_not_import_xml():
+    times = importtime('from ergaleia import Config')
+    assert 'ergaleia.un_comment' in times  # imported by ergaleia.config
+    assert 'ergaleia.from_xml' not in times
+    assert 'xml.sax' not in times
+    assert 'asyncio' not in times
+    assert 'hashlib' not in times
+
+
+def test_from_xml_does_not_import_executors():
+    times = importtime('from ergaleia import from_xml')
+    assert 'ergaleia.normalize_path' in times  # imported by from_xml
+    assert 'concurrent.futures' not in times
+    assert 'multiprocessing' not in times
+    assert 'pickle' not in times
+
+
+@pytest.mark.parametrize('name', ergaleia.__all__)
+def test_names(name):
+    value = getattr(ergaleia, name)
+    assert value is getattr(
+        sys.modules['ergaleia.' + ergaleia._LAZY[name]], name)
+
+
+def test_submodule_does_not_hide_function():
+    import ergaleia.nested_get  # noqa: F401
+    from ergaleia import nested_get
+    assert callable(nested_get)
+    assert nested_get({'a': 1}, 'a') == 1
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError):
+        ergaleia.akk
+    with pytest.raises(ImportError):
+        from ergaleia import akk  # noqa: F401
+
+
+def test_dir():
+    assert set(ergaleia.__all__) <= set(dir(ergaleia))
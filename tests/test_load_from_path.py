@@ -1,10 +1,17 @@
+import asyncio
+import mmap
 import pytest
+import sys
+from types import GeneratorType
+import zipfile
 try:
     from StringIO import StringIO
 except Exception:
     from io import StringIO
 
-from ergaleia import load_from_path, load_lines_from_path
+from ergaleia import (
+    aload_from_path, aload_lines_from_path, clear_resource_cache,
+    iter_lines_from_path, load_from_path, load_lines_from_path, load_resource)
 
 
 @pytest.fixture
@@ -53,3 +60,90 @@ def test_load_from_path_missing_file():
         load_from_path('tests.akk')
     with pytest.raises(IOError):
         load_from_path('test/akk')
+
+
+def test_iter_lines_from_path_file():
+    lines = iter_lines_from_path('tests.load_from_path.data', 'data')
+    assert isinstance(lines, GeneratorType)
+    assert list(lines) == ['one\n', 'two\n', 'three\n']
+
+
+def test_iter_lines_from_path_string(string_file):
+    assert list(iter_lines_from_path(string_file)) == ['one\n', 'two']
+
+
+def test_iter_lines_from_path_list():
+    assert list(iter_lines_from_path(['one', 'two'])) == ['one', 'two']
+
+
+def test_load_from_path_mmap():
+    data = load_from_path('tests.load_from_path.data', 'data', mmap=True)
+    assert isinstance(data, mmap.mmap)
+    assert data[:] == b'one\ntwo\nthree\n'
+    with pytest.raises(TypeError):
+        data[0] = 0
+    data.close()
+
+
+def test_load_from_path_mmap_empty(tmp_path):
+    path = tmp_path / 'empty'
+    path.write_bytes(b'')
+    assert load_from_path(str(path), mmap=True) == b''
+
+
+@pytest.fixture
+def zipped(tmp_path, monkeypatch):
+    archive = tmp_path / 'app.zip'
+    with zipfile.ZipFile(str(archive), 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('zipped_pkg/__init__.py', '')
+        z.writestr('zipped_pkg/data/values.txt', 'one\ntwo\n')
+    monkeypatch.syspath_prepend(str(archive))
+    clear_resource_cache()
+    yield 'zipped_pkg.data.values.txt'
+    sys.modules.pop('zipped_pkg', None)
+    clear_resource_cache()
+
+
+def test_load_resource(zipped):
+    assert load_resource(zipped) == b'one\ntwo\n'
+    assert load_resource(zipped) is load_resource(zipped)
+
+
+def test_load_resource_filesystem():
+    assert load_resource(
+        'tests.load_from_path.data', 'data') == b'one\ntwo\nthree\n'
+
+
+def test_load_resource_missing(zipped):
+    with pytest.raises(Exception):
+        load_resource('zipped_pkg.data.nope.txt')
+    with pytest.raises(ValueError):
+        load_resource('values.txt')
+
+
+def test_load_from_path_zip(zipped):
+    assert load_from_path(zipped) == 'one\ntwo\n'
+    assert load_from_path(zipped, mmap=True) == b'one\ntwo\n'
+    assert load_lines_from_path(zipped) == ['one\n', 'two\n']
+    assert list(iter_lines_from_path(zipped)) == ['one\n', 'two\n']
+
+
+def test_load_from_path_zip_missing(zipped):
+    with pytest.raises(IOError):
+        load_from_path('zipped_pkg.data.nope.txt')
+
+
+def test_aload_from_path():
+    async def load():
+        return await asyncio.gather(
+            aload_from_path('tests.load_from_path.data', 'data'),
+            aload_lines_from_path('tests.load_from_path.data', 'data'),
+        )
+    data, lines = asyncio.run(load())
+    assert data == 'one\ntwo\nthree\n'
+    assert lines == ['one\n', 'two\n', 'three\n']
+
+
+def test_aload_from_path_missing_file():
+    with pytest.raises(IOError):
+        asyncio.run(aload_from_path('tests.akk'))
@@ -1,6 +1,8 @@
+from array import array
 import pytest
 
-from ergaleia import nested_get
+from ergaleia import (
+    compile_find, compile_path, nested_find, nested_get, nested_get_many)
 
 
 @pytest.fixture
@@ -56,3 +58,123 @@ def test_as_list_default(data):
     assert nested_get(
         data, ('a', 'b', 'c', 'd'), default='foo', as_list=True
     ) == ['foo']
+
+
+@pytest.mark.parametrize('keys', [
+    ('a',),
+    ('a', 'b'),
+    'a.b',
+    'a.b.c',
+    'a.b.c.d',
+    'z',
+    (),
+])
+@pytest.mark.parametrize('default', [None, 'hey'])
+@pytest.mark.parametrize('as_list', [False, True])
+def test_compile_path(data, keys, default, as_list):
+    get = compile_path(keys, default=default, as_list=as_list)
+    assert get(data) == nested_get(
+        data, keys, default=default, as_list=as_list)
+
+
+def test_compile_path_required(data):
+    with pytest.raises(KeyError):
+        compile_path('z', required=True)(data)
+    with pytest.raises(TypeError):
+        compile_path('a.b.c.d', required=True)(data)
+
+
+def test_compile_path_odd_keys():
+    get = compile_path(['a', "b'c", 1])
+    assert get({'a': {"b'c": {1: 'x'}}}) == 'x'
+
+
+@pytest.fixture
+def records():
+    return [
+        {'a': {'b': {'c': 1}, 'd': 2}},
+        {'a': {'b': {'c': 3}}},
+        {'a': 'x'},
+        {},
+    ]
+
+
+def test_nested_get_many(records):
+    paths = ['a.b.c', ('a', 'd'), 'a', 'a.b', 'e']
+    columns = nested_get_many(records, paths, default=0)
+    assert columns == [
+        [nested_get(r, p, default=0) for r in records] for p in paths
+    ]
+
+
+def test_nested_get_many_single(records):
+    assert nested_get_many(records, 'a.b.c') == [1, 3, None, None]
+
+
+def test_nested_get_many_dtype(records):
+    column = nested_get_many(records, 'a.b.c', default=-1, dtype='q')
+    assert column == array('q', [1, 3, -1, -1])
+
+
+def test_nested_get_many_generator(records):
+    column, = nested_get_many(iter(records), ['a.d'])
+    assert column == [2, None, None, None]
+
+
+@pytest.mark.parametrize('depth', [16, 17, 200])
+def test_nested_get_many_deep(depth):
+    record = value = {}
+    for _ in range(depth - 1):
+        value['a'] = {}
+        value = value['a']
+    value['a'] = 1
+    path = '.'.join(['a'] * depth)
+    columns = nested_get_many([record, {}], [path, path + '.b'], default=0)
+    assert columns == [[1, 0], [0, 0]]
+    assert nested_get(record, path) == 1
+
+
+def test_nested_get_many_default(records):
+    assert nested_get_many(records, 'a.d', default=0) == [2, 0, 0, 0]
+    assert nested_get_many(records, 'a.d', default=-1) == [2, -1, -1, -1]
+
+
+@pytest.fixture
+def items():
+    return {'items': {'item': [
+        {'id': 'a', 'price': 1},
+        {'id': 'b', 'price': 2},
+        {'id': 'c'},
+    ]}}
+
+
+@pytest.mark.parametrize('keys,expected', [
+    ('items.item.*.price', [1, 2]),
+    ('items.item.*.id', ['a', 'b', 'c']),
+    ('items.item.0.id', ['a']),
+    ('items.item.2.id', ['c']),
+    ('items.item.3.id', []),
+    (('items', 'item', 1, 'price'), [2]),
+    ('items.*.*.id', ['a', 'b', 'c']),
+    ('items.item', [[
+        {'id': 'a', 'price': 1},
+        {'id': 'b', 'price': 2},
+        {'id': 'c'},
+    ]]),
+    ('items.item.*.price.*', []),
+    ('nope.*', []),
+])
+def test_nested_find(items, keys, expected):
+    assert list(nested_find(items, keys)) == expected
+    assert list(compile_find(keys)(items)) == expected
+
+
+def test_nested_find_digit_dict_key():
+    assert list(nested_find({'a': {'0': 'x'}}, 'a.0')) == ['x']
+
+
+def test_nested_find_lazy(items):
+    matches = nested_find(items, 'items.item.*.id')
+    assert next(matches) == 'a'
+    items['items']['item'][1]['id'] = 'changed'
+    assert list(matches) == ['changed', 'c']
@@ -1,7 +1,8 @@
+import importlib.util
 import os
 import pytest
 
-from ergaleia import normalize_path
+from ergaleia import clear_path_cache, normalize_path, prewarm_path_cache
 
 
 BASE = os.path.sep.join(__file__.split(os.path.sep)[:-2])
@@ -27,3 +28,49 @@ def test_normalize_os_path():
 
 def test_normalize_non_string_path():
     assert normalize_path(['what', 'dude']) == ['what', 'dude']
+
+
+@pytest.fixture
+def find_spec(monkeypatch):
+    calls = []
+    real = importlib.util.find_spec
+
+    def counting_find_spec(name):
+        calls.append(name)
+        return real(name)
+
+    clear_path_cache()
+    monkeypatch.setattr(importlib.util, 'find_spec', counting_find_spec)
+    yield calls
+    clear_path_cache()
+
+
+def test_cache(find_spec):
+    expected = os.path.sep.join((BASE, 'tests/load_from_path.data'))
+    assert normalize_path('tests.load_from_path.data') == expected
+    assert normalize_path('tests.load_from_path.data') == expected
+    assert find_spec == ['tests']
+    normalize_path('tests.load_from_path.data', 'data')
+    assert find_spec == ['tests', 'tests']
+
+
+def test_cache_clear(find_spec):
+    normalize_path('tests.load_from_path.data')
+    clear_path_cache()
+    normalize_path('tests.load_from_path.data')
+    assert find_spec == ['tests', 'tests']
+
+
+def test_cache_sys_path(find_spec, monkeypatch):
+    normalize_path('tests.load_from_path.data')
+    monkeypatch.syspath_prepend(BASE)
+    normalize_path('tests.load_from_path.data')
+    assert find_spec == ['tests', 'tests']
+
+
+def test_prewarm(find_spec):
+    prewarm_path_cache(['tests.a.data', 'tests.b.data'])
+    assert find_spec == ['tests', 'tests']
+    normalize_path('tests.a.data')
+    normalize_path('tests.b.data')
+    assert len(find_spec) == 2
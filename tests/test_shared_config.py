@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from ergaleia.config import Config
+from ergaleia.shared_config import SharedConfig
+
+
+@pytest.fixture
+def shared():
+    shared = SharedConfig.create(size=4096)
+    yield shared
+    shared.close()
+    shared.unlink()
+
+
+@pytest.fixture
+def config():
+    c = Config()
+    c._define('a.b', 1, validator=int)
+    c._define('c', 'x')
+    return c
+
+
+def test_unpublished(shared):
+    worker = SharedConfig(shared.name)
+    assert worker.refresh() is None
+    assert worker.config is None
+    worker.close()
+
+
+def test_publish(shared, config):
+    assert shared.publish(config) == 2
+    worker = SharedConfig(shared.name)
+    c = worker.refresh()
+    assert c is worker.config
+    assert c.a.b == 1
+    assert c.c == 'x'
+    assert worker.version == 2
+    assert worker.refresh() is None
+    worker.close()
+
+
+def test_republish(shared, config):
+    shared.publish(config)
+    worker = SharedConfig(shared.name)
+    first = worker.refresh()
+    config.a.b = '10'
+    assert shared.publish(config) == 4
+    second = worker.refresh()
+    assert second is not first
+    assert second.a.b == 10
+    assert first.a.b == 1
+    worker.close()
+
+
+def test_too_large(config):
+    shared = SharedConfig.create(size=8)
+    try:
+        with pytest.raises(ValueError):
+            shared.publish(config)
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def _worker(name, queue):
+    worker = SharedConfig(name)
+    config = worker.refresh()
+    queue.put((worker.version, config._as_dict))
+    worker.close()
+
+
+def test_process(shared, config):
+    shared.publish(config)
+    queue = multiprocessing.Queue()
+    p = multiprocessing.Process(target=_worker, args=(shared.name, queue))
+    p.start()
+    version, values = queue.get(timeout=10)
+    p.join()
+    assert version == 2
+    assert values == {'a.b': 1, 'c': 'x'}
+
+
+def test_publish_in_progress(shared, config):
+    shared.publish(config)
+    worker = SharedConfig(shared.name)
+    first = worker.refresh()
+    struct.pack_into('Q', shared.shm.buf, 0, 3)  # publisher died mid-write
+    assert worker.refresh(timeout=0.01) is None
+    assert worker.config is first
+    assert worker.version == 2
+    worker.close()
+
+
+def _publisher(name, count):
+    shared = SharedConfig(name)
+    c = Config()
+    c._define('a', 0)
+    c._define('b', 0)
+    c._define('pad', 'x' * 1000)
+    for n in range(1, count + 1):
+        c.a = c.b = n
+        shared.publish(c)
+    shared.close()
+
+
+def _reader(name, done, queue):
+    worker = SharedConfig(name)
+    refreshes = errors = 0
+    while not done.is_set():
+        try:
+            config = worker.refresh()
+        except Exception:
+            errors += 1
+            continue
+        if config is not None:
+            refreshes += 1
+            if config.a != config.b:
+                errors += 1
+    queue.put((refreshes, errors))
+    worker.close()
+
+
+def test_concurrent(shared):
+    context = multiprocessing.get_context('fork')
+    done = context.Event()
+    queue = context.Queue()
+    readers = [
+        context.Process(target=_reader, args=(shared.name, done, queue))
+        for _ in range(3)
+    ]
+    for reader in readers:
+        reader.start()
+    publisher = context.Process(target=_publisher, args=(shared.name, 20000))
+    publisher.start()
+    publisher.join()
+    done.set()
+    results = [queue.get(timeout=10) for _ in readers]
+    for reader in readers:
+        reader.join()
+    assert all(refreshes for refreshes, _ in results)
+    assert [errors for _, errors in results] == [0, 0, 0]
+
+
+FORKED_WORKER = '''
+import multiprocessing
+from ergaleia.config import Config
+from ergaleia.shared_config import SharedConfig
+
+def work(name):
+    shared = SharedConfig(name)
+    shared.refresh()
+    shared.close()
+
+if __name__ == '__main__':
+    shared = SharedConfig.create()
+    shared.publish(Config(['a 1']))
+    context = multiprocessing.get_context('fork')
+    p = context.Process(target=work, args=(shared.name,))
+    p.start()
+    p.join()
+    shared.close()
+    shared.unlink()
+'''
+
+
+def test_forked_worker_keeps_registration(tmp_path):
+    script = tmp_path / 'forked.py'
+    script.write_text(FORKED_WORKER)
+    result = subprocess.run(
+        [sys.executable, '-X', 'dev', str(script)],
+        stderr=subprocess.PIPE, universal_newlines=True,
+        env=dict(os.environ, PYTHONPATH=os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))),
+    )
+    assert result.returncode == 0
+    assert 'KeyError' not in result.stderr
+    assert 'leaked' not in result.stderr
@@ -1,6 +1,6 @@
 """tests for to_arg"""
 import pytest
-from ergaleia import to_args
+from ergaleia import make_to_args_cache, to_args, to_args_cached
 
 
 @pytest.mark.parametrize('value,args_expected,kwargs_expected', [
@@ -34,3 +34,66 @@ def test_numeric_value():
     _, kwargs = to_args("a=10 b='20'")
     assert kwargs['a'] == 10
     assert kwargs['b'] == '20'
+
+
+@pytest.mark.parametrize('value,args_expected,kwargs_expected', [
+    ('a b"b c"c d e "and ""this""" \'b c\' d=e f g h e=1 f="abc""def"',
+     ['a', 'b"b', 'c"c', 'd', 'e', 'and "this"', 'b c', 'f', 'g', 'h'],
+     {'d': 'e', 'e': 1, 'f': 'abc"def'}),
+    ('"a b=c d" e', ['a b=c d', 'e'], {}),
+    ("a='b c=d' e", ['e'], {'a': 'b c=d'}),
+    ('a=b=c', [], {'a=b': 'c'}),
+    ('a=', ['a='], {}),
+    ('a="b c', ['c'], {'a': '"b'}),
+    ('a=1 a=2', [], {'a': 2}),
+    ("a='x=y'", [], {'a': 'x=y'}),
+    ('url="http://h/?a=b"', [], {'url': 'http://h/?a=b'}),
+    ('a = "x = y" b', ['b'], {'a': 'x = y'}),
+    ("a='b =c d' e='f='", [], {'a': 'b =c d', 'e': 'f='}),
+    ('a="b=" "c d"', ['c d'], {'a': 'b='}),
+])
+def test_to_args_tokens(value, args_expected, kwargs_expected):
+    """edge cases of the tokenizer"""
+    assert to_args(value) == (args_expected, kwargs_expected)
+
+
+def test_long_line():
+    """many tokens in a single line"""
+    line = ' '.join(
+        'a{0} "b {0}" c{0}=d e{0}="f g"'.format(n) for n in range(500))
+    args, kwargs = to_args(line)
+    assert len(args) == 1000
+    assert args[-2:] == ['a499', 'b 499']
+    assert len(kwargs) == 1000
+    assert kwargs['e499'] == 'f g'
+
+
+def test_cached():
+    """cached results match and can't be changed by the caller"""
+    cached = make_to_args_cache(maxsize=2)
+    line = 'a 1 b=c d="e f"'
+    args, kwargs = cached(line)
+    assert (args, kwargs) == to_args(line)
+    args.append('x')
+    kwargs['y'] = 'z'
+    assert cached(line) == to_args(line)
+    info = cached.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_cached_bounds():
+    """cache size and line length are limited"""
+    cached = make_to_args_cache(maxsize=2, max_line=10)
+    for line in ('a', 'b', 'c', 'a'):
+        cached(line)
+    assert cached.cache_info().currsize == 2
+    assert cached.cache_info().hits == 0
+    assert cached('a' * 11) == (['a' * 11], {})
+    assert cached.cache_info().misses == 4
+    cached.cache_clear()
+    assert cached.cache_info().currsize == 0
+
+
+def test_to_args_cached():
+    """module level cache"""
+    assert to_args_cached('a b=1') == (['a'], {'b': 1})
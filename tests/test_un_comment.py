@@ -1,5 +1,7 @@
+from io import StringIO
 import pytest
-from ergaleia import un_comment
+from types import GeneratorType
+from ergaleia import make_un_commenter, un_comment
 
 
 @pytest.mark.parametrize('value,expected', [
@@ -32,3 +34,36 @@ def test_un_comment(value, expected):
 ])
 def test_un_comment_strip(value, strip, expected):
     assert un_comment(value, strip=strip) == expected
+
+
+@pytest.mark.parametrize('value,comment,expected', [
+    ('a // b', '//', 'a'),
+    (r'a \// b // c', '//', 'a // b'),
+    ('a * b', '*', 'a'),
+    (r'a \* b * c', '*', 'a * b'),
+    ('a.b', '.', 'a'),
+    ('a # b', ';', 'a # b'),
+    (r'a \; b', ';', 'a ; b'),
+    (r'a \b', ';', r'a \b'),
+])
+def test_un_comment_marker(value, comment, expected):
+    assert un_comment(value, comment) == expected
+
+
+def test_make_un_commenter():
+    strip = make_un_commenter('#')
+    assert strip is make_un_commenter('#')
+    assert strip(r' a \# b # c ') == 'a # b'
+    assert make_un_commenter('#', strip=False)(' a # b') == ' a '
+
+
+def test_un_comment_iterable():
+    lines = un_comment(iter(['a#1', ' b ', '#c']))
+    assert isinstance(lines, GeneratorType)
+    assert list(lines) == ['a', 'b', '']
+
+
+def test_un_comment_file():
+    lines = un_comment(StringIO('a # 1\n  b\n'), strip=False)
+    assert next(lines) == 'a '
+    assert list(lines) == ['  b\n']